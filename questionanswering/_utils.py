@@ -1,9 +1,9 @@
 # Embeddings and vocabulary utility methods
 import codecs
 import logging
+import pickle
 import re
 import os
-from collections import defaultdict
 
 import json
 import nltk
@@ -34,11 +34,34 @@ corenlp_caseless = {
 }
 
 
+# Dedicated random generator for the package, so that random draws do not go through
+# the global numpy state; load_config reseeds it together with the other seeds
+rng = np.random.RandomState(1)
+
+
+class Vocabulary(dict):
+    """
+    A word-to-index mapping that resolves unknown words to the unknown-element index without
+    storing them. Unlike a defaultdict, lookups never grow the dictionary, so encoding unseen
+    input does not pollute the vocabulary over a long run, and instances can be pickled.
+
+    >>> v = Vocabulary({all_zeroes: 0, unknown_el: 1, "who": 2})
+    >>> v["who"], v["nonexistent"]
+    (2, 1)
+    >>> len(v)
+    3
+    """
+
+    def __missing__(self, key):
+        return self.get(unknown_el, 1)
+
 module_location = os.path.abspath(__file__)
 module_location = os.path.dirname(module_location)
 RESOURCES_FOLDER = os.path.join(module_location, "..", "resources/")
 
 split_pattern = re.compile(r"[\s'-:,]")
+trim_pattern = re.compile(r"(^\W|\W$)")
+digits_pattern = re.compile(r"([0-9][0-9.,]*)")
 
 
 def get_tagged_from_server(input_text, caseless=False):
@@ -181,21 +204,34 @@ def load_resource_file_backoff(f):
 
 def load_word_embeddings(path):
     """
-    Loads pre-trained embeddings from the specified path.
+    Loads pre-trained embeddings from the specified path. The parsed matrix and vocabulary are
+    cached next to the original file as a binary .npz archive, so that subsequent runs skip
+    parsing the text file.
 
     @return (embeddings as an numpy array, word to index dictionary)
     """
-    word2idx = defaultdict(lambda: 1)  # Maps a word to the index in the embeddings matrix
+    word2idx = Vocabulary()  # Maps a word to the index in the embeddings matrix
     word2idx[all_zeroes] = 0
     word2idx[unknown_el] = 1
-    embeddings = []
 
+    cache_path = path + ".npz"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        cached = np.load(cache_path)
+        embeddings = cached['embeddings']
+        for idx, word in enumerate(cached['words'].tolist(), 2):
+            word2idx[word] = idx
+        logger.debug("Loaded from cache: {}".format(embeddings.shape))
+        return embeddings, word2idx
+
+    words = []
+    embeddings = []
     with codecs.open(path, 'r', encoding='utf-8') as fIn:
         idx = 2
         for line in fIn:
             split = line.strip().split(' ')
             embeddings.append([float(num) for num in split[1:]])
             word2idx[split[0]] = idx
+            words.append(split[0])
             idx += 1
 
     embedding_size = len(embeddings[0])
@@ -207,6 +243,11 @@ def load_word_embeddings(path):
                                  embeddings), axis=0)
     logger.debug("Loaded: {}".format(embeddings.shape))
 
+    try:
+        np.savez(cache_path, embeddings=embeddings, words=np.asarray(words))
+    except OSError as ex:
+        logger.error("Could not cache the embeddings. {}".format(ex))
+
     return embeddings, word2idx
 
 
@@ -226,12 +267,12 @@ def get_idx(word, word2idx):
         return word2idx[word.lower()]
     elif word in special_tokens:
         return word2idx.get(special_tokens[word], unknown_idx)
-    trimmed = re.sub("(^\W|\W$)", "", word)
+    trimmed = trim_pattern.sub("", word)
     if trimmed in word2idx:
         return word2idx[trimmed]
     elif trimmed.lower() in word2idx:
         return word2idx[trimmed.lower()]
-    no_digits = re.sub("([0-9][0-9.,]*)", '0', word)
+    no_digits = digits_pattern.sub('0', word)
     if no_digits in word2idx:
         return word2idx[no_digits]
     return unknown_idx
@@ -246,7 +287,9 @@ def get_trigram_index(sentences):
     >>> len(get_trigram_index([['who', 'played', 'whom']]))
     11
     """
-    trigram_set = {t for tokens in sentences for t in tokens_to_trigrams(tokens)}
+    # Extract trigrams from each distinct token once, tokens repeat heavily across sentences
+    unique_tokens = {t for tokens in sentences for t in tokens}
+    trigram_set = {trigram for t in unique_tokens for trigram in tokens_to_trigrams([t])}
     trigram2idx = {t: i for i, t in enumerate(trigram_set, 1)}
     trigram2idx[all_zeroes] = 0
     trigram2idx[unknown_el] = len(trigram2idx)
@@ -256,13 +299,19 @@ def get_trigram_index(sentences):
 def tokens_to_trigrams(tokens):
     """
     Convert a list of tokens to a list of trigrams following the hashing technique.
+    Each trigram is a single 3-character string, which hashes faster and stores much more
+    compactly than a tuple of one-character strings.
 
     :param tokens: list of tokens
-    :return: list of triples of characters
+    :return: list of character trigrams
     >>> tokens_to_trigrams(['who', 'played', 'bond'])
-    [('#', 'w', 'h'), ('w', 'h', 'o'), ('h', 'o', '#'), ('#', 'p', 'l'), ('p', 'l', 'a'), ('l', 'a', 'y'), ('a', 'y', 'e'), ('y', 'e', 'd'), ('e', 'd', '#'), ('#', 'b', 'o'), ('b', 'o', 'n'), ('o', 'n', 'd'), ('n', 'd', '#')]
+    ['#wh', 'who', 'ho#', '#pl', 'pla', 'lay', 'aye', 'yed', 'ed#', '#bo', 'bon', 'ond', 'nd#']
     """
-    return [trigram for t in tokens for trigram in nltk.ngrams("#{}#".format(t), 3)]
+    trigrams = []
+    for t in tokens:
+        padded = "#{}#".format(t)
+        trigrams += [padded[i:i+3] for i in range(len(padded) - 2)]
+    return trigrams
 
 
 def get_elements_index(element_set: Set):
@@ -313,17 +362,27 @@ def load_property_labels(path_to_property_labels):
 @load_resource_file_backoff
 def load_entity_freq_map(path_to_map):
     """
-    Load the map of entity frequencies from a file.
+    Load the map of entity frequencies from a file. The parsed dictionary is cached next to
+    the source file in binary pickle format, so subsequent startups skip the text parsing.
 
     :param path_to_map: location of the map file
     :return: entity map as a dictionary
     >>> load_entity_freq_map("../resources/wikidata_entity_freqs.map")['Q76']
     7070
     """
+    cache_path = path_to_map + ".pkl"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path_to_map):
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
     with open(path_to_map) as f:
         return_map = [tuple(l.strip().split("\t")) for l in f.readlines()]
-        return_map = [(k, int(v)) for k, v in return_map]
-    return dict(return_map)
+        return_map = dict((k, int(v)) for k, v in return_map)
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump(return_map, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as ex:
+        logger.error("Could not cache the entity frequencies. {}".format(ex))
+    return return_map
 
 
 @load_resource_file_backoff
@@ -6,6 +6,7 @@ import random
 import numpy as np
 import torch
 
+from questionanswering import _utils
 from questionanswering.grounding import staged_generation
 from wikidata import endpoint_access
 
@@ -24,11 +25,13 @@ def load_config(config_file_path, seed=-1, gpuid=-1):
 
     if seed < 0:
         np.random.seed(config_global.get('random.seed', 1))
+        _utils.rng = np.random.RandomState(config_global.get('random.seed', 1))
         random.seed(seed)
         torch.manual_seed(config_global.get('random.seed', 1))
         logger.info("Seed: {}".format(config_global.get('random.seed', 1)))
     else:
         np.random.seed(seed)
+        _utils.rng = np.random.RandomState(seed)
         random.seed(seed)
         torch.manual_seed(seed)
         logger.info("Seed: {}".format(seed))
@@ -38,6 +41,8 @@ def load_config(config_file_path, seed=-1, gpuid=-1):
 
     if torch.cuda.is_available():
         logger.info("Using your CUDA device")
+        # All encoded inputs have fixed shapes, let cuDNN benchmark the fastest conv kernels
+        torch.backends.cudnn.benchmark = True
         if seed < 0:
             torch.cuda.manual_seed(config_global.get('random.seed', 1))
         else:
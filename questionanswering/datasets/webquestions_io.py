@@ -10,6 +10,7 @@ import itertools
 from wikidata import scheme
 
 from questionanswering import base_objects
+from questionanswering import _utils
 from questionanswering.construction import graph
 from questionanswering.datasets.dataset import Dataset
 
@@ -23,7 +24,7 @@ class DatasetWithoutNegatives(Dataset, metaclass=abc.ABCMeta):
         self._idx2property = []
 
     def get_training_samples(self, model=None):
-        indices = np.random.choice(len(self._questions_data), self._p.get("instances.per.epoch", 10000), replace=False)
+        indices = _utils.rng.choice(len(self._questions_data), self._p.get("instances.per.epoch", 10000), replace=False)
         return self._get_indexed_samples(indices)
 
     def get_question_tokens(self, index):
@@ -48,7 +49,7 @@ class DatasetWithoutNegatives(Dataset, metaclass=abc.ABCMeta):
             negative_pool = [(g, 0.0) for g in negative_pool]
             one_negative = negative_pool[-1]
             instance = graph_list + negative_pool[:-1]
-            np.random.shuffle(instance)
+            _utils.rng.shuffle(instance)
             instance = [one_negative] + instance
 
             target = [g[1] for g in instance] + [0.0] * (self._p.get("max.negative.samples", 30) - len(instance))
@@ -64,7 +65,7 @@ class DatasetWithoutNegatives(Dataset, metaclass=abc.ABCMeta):
         for i in range(pool_size):
             neg_graph = graph.copy_graph(sentence)
             for edge in neg_graph['edgeSet']:
-                edge['kbID'] = self._idx2property[np.random.randint(len(self._idx2property))] + "v"
+                edge['kbID'] = self._idx2property[_utils.rng.randint(len(self._idx2property))] + "v"
                 if "label" in edge:
                     del edge["label"]
             negative_pool.append(neg_graph)
@@ -216,7 +217,7 @@ class WebQuestions(Dataset):
                     targets.append(target)
             else:
                 if len(graph_list) > self._p.get("max.silver.samples", 15):
-                    graph_list = [graph_list[i] for i in np.random.choice(range(len(graph_list)),
+                    graph_list = [graph_list[i] for i in _utils.rng.choice(range(len(graph_list)),
                                                                           self._p.get("max.silver.samples", 15),
                                                                           replace=False)]
                 graph_list, target = self._instance_with_negative(graph_list, negative_pool, negative_pool_scores)
@@ -251,14 +252,14 @@ class WebQuestions(Dataset):
                 negative_pool = [negative_pool[id] for id in negative_pool_indices]
             else:
                 if len(negative_pool) > negative_pool_size:
-                    negative_pool = np.random.choice(negative_pool,
+                    negative_pool = _utils.rng.choice(negative_pool,
                                                      negative_pool_size,
                                                      replace=False)
             instance += [(n_g,) for n_g in negative_pool]
         # This is to make sure the zero element is never the target. It is needed for some of the PyTorch losses and shouldn't affect others
         one_negative = instance[-1]
         instance = instance[:-1]
-        np.random.shuffle(instance)
+        _utils.rng.shuffle(instance)
         instance = [one_negative] + instance
 
         target_value_index = 2 if self._p.get("target.value", "f1") else 1 if self._p.get("target.value", "rec") else 0
@@ -69,6 +69,9 @@ def generate(path_to_model, config_file_path, seed, gpuid, experiment_tag):
         logger=logger
     )
     container.load_from_file(path_to_model)
+    # Inference only: switch the network to eval mode once, so every forward pass in the
+    # question loop below runs with dropout layers as no-ops
+    container._model.eval()
     model_gated = container._model._gnn.hp_gated if model_type == "GNNModel" else False
 
     # Load the freebase entity set that was used top restrict the answer space by the previous work if specified.
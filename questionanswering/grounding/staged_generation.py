@@ -1,3 +1,4 @@
+import heapq
 import logging
 from copy import copy
 from typing import List
@@ -154,15 +155,15 @@ def ground_with_model(input_graphs, s, qa_model, min_score, beam_size=10, verify
     if len(sentences) == 0:
         return []
     samples = V.encode_for_model(sentences, qa_model._model.__class__.__name__)
-    model_scores = qa_model.predict_batchwise(*samples).view(-1).data
+    # Pull the scores out of the tensor in one go, per-element tensor indexing in the loop below is slow
+    model_scores = qa_model.predict_batchwise(*samples).view(-1).data.tolist()
 
     logger.debug("model_scores: {}".format(model_scores))
-    all_chosen_graphs = [WithScore(grounded_graphs[i], (0.0, 0.0, model_scores[i]))
-                         for i in range(len(grounded_graphs)) if model_scores[i] > min_score]
+    all_chosen_graphs = [WithScore(s_g, (0.0, 0.0, score))
+                         for s_g, score in zip(grounded_graphs, model_scores) if score > min_score]
 
-    all_chosen_graphs = sorted(all_chosen_graphs, key=lambda x: x[1], reverse=True)
-    if len(all_chosen_graphs) > beam_size:
-        all_chosen_graphs = all_chosen_graphs[:beam_size]
+    # Only the beam_size best graphs are kept, so a partial sort is enough
+    all_chosen_graphs = heapq.nlargest(beam_size, all_chosen_graphs, key=lambda x: x[1])
     logger.debug("Number of chosen groundings: {}".format(len(all_chosen_graphs)))
     return all_chosen_graphs
 
@@ -102,7 +102,6 @@ class GNN(nn.Module):
         self.hp_gated = hp_gated
         self._steps = 5
 
-        self._prop_model: nn.Module = GatedPropagationModel(hp_out_features)
         self._prop_model: nn.Module = GatedPropagationModel(hp_out_features) if hp_gated else \
             PropagationModel(hp_out_features)
 
@@ -47,17 +47,19 @@ class STAGGModel(nn.Module):
     def forward(self, questions_m, graphs_m, graphs_features_m):
         graphs_features_m = graphs_features_m.float()
 
-        question_vector1 = self._tokens_encoder(questions_m[..., 0, :])
-        question_vector2 = self._tokens_encoder(questions_m[..., 1, :])
-
-        edge_vectors1 = self._tokens_encoder(graphs_m[..., 0, :]
-                                             .contiguous()
-                                             .view(-1, graphs_m.size(-1)))
-        edge_vectors2 = self._tokens_encoder(graphs_m[..., 1, :]
-                                             .contiguous()
-                                             .view(-1, graphs_m.size(-1)))
-        edge_vectors1 = edge_vectors1.view(-1, graphs_m.size(1), edge_vectors1.size(-1))
-        edge_vectors2 = edge_vectors2.view(-1, graphs_m.size(1), edge_vectors2.size(-1))
+        # Fold the two encoding channels into the batch dimension, so that the conv encoder
+        # runs once per input instead of once per channel
+        question_vectors = self._tokens_encoder(questions_m.contiguous()
+                                                .view(-1, questions_m.size(-1)))
+        question_vectors = question_vectors.view(-1, 2, question_vectors.size(-1))
+        question_vector1 = question_vectors[:, 0].contiguous()
+        question_vector2 = question_vectors[:, 1].contiguous()
+
+        edge_vectors = self._tokens_encoder(graphs_m.contiguous()
+                                            .view(-1, graphs_m.size(-1)))
+        edge_vectors = edge_vectors.view(-1, graphs_m.size(1), 2, edge_vectors.size(-1))
+        edge_vectors1 = edge_vectors[..., 0, :].contiguous()
+        edge_vectors2 = edge_vectors[..., 1, :].contiguous()
 
         # Batch cosine similarity
         predictions1 = batchmv_cosine_similarity(edge_vectors1, question_vector1)
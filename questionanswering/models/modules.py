@@ -69,12 +69,12 @@ class ConvWordsEncoder(nn.Module):
                                                  self._nonlinearity
                                                  )
 
-        self._pool = {
-            'max': nn.AdaptiveMaxPool1d(1),
-            'avg': nn.AdaptiveAvgPool1d(1),
-            'logsumexp': P.LogSumExpPooling1d()
-        }.get(hp_pooling,
-              nn.AdaptiveMaxPool1d(1))
+        if hp_pooling == 'avg':
+            self._pool = nn.AdaptiveAvgPool1d(1)
+        elif hp_pooling == 'logsumexp':
+            self._pool = P.LogSumExpPooling1d()
+        else:
+            self._pool = nn.AdaptiveMaxPool1d(1)
 
         if self.hp_add_top_dense_layer:
             self._semantic_layer = nn.Sequential(nn.Linear(in_features=hp_conv_size,
@@ -117,8 +117,11 @@ def batchmv_cosine_similarity(m, v):
     :param v: a 2D tensor that contains a batch of vectors
     :return: a 2D tensor with similarity values per vector * matrix row
     """
-    predictions = torch.bmm(m, v.unsqueeze(2)).squeeze()
-    w1 = torch.norm(m, 2, dim=-1)
-    w2 = torch.norm(v, 2, dim=-1, keepdim=True)
-    predictions = (predictions / (w1 * w2.expand_as(w1)).clamp(min=10e-8))
+    # The vector is compared against every matrix row, so it is normalized once up front;
+    # the single division by the row norms then replaces the norm-product intermediate
+    v_norm = torch.norm(v, 2, dim=-1, keepdim=True).clamp(min=10e-8)
+    v = v / v_norm.expand_as(v)
+    predictions = torch.bmm(m, v.unsqueeze(2)).squeeze(-1)
+    w1 = torch.norm(m, 2, dim=-1).clamp(min=10e-8)
+    predictions = predictions / w1
     return predictions
\ No newline at end of file
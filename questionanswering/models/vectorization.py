@@ -1,8 +1,11 @@
+import multiprocessing
+
 import numpy as np
 
 from typing import List
 
 from collections import defaultdict
+from functools import lru_cache
 
 from questionanswering import _utils
 from questionanswering.construction.graph import SemanticGraph, Edge
@@ -26,10 +29,18 @@ MAX_NEGATIVE_GRAPHS = 100
 WORD_2_IDX = None
 
 
-def encode_for_model(selected_questions, model_type, word2idx=None):
+def encode_for_model(selected_questions, model_type, word2idx=None, n_jobs=1):
     assert word2idx or WORD_2_IDX
     if not word2idx:
         word2idx = WORD_2_IDX
+    if n_jobs > 1 and len(selected_questions) > n_jobs:
+        chunk_size = (len(selected_questions) + n_jobs - 1) // n_jobs
+        chunks = [selected_questions[i:i + chunk_size] for i in range(0, len(selected_questions), chunk_size)]
+        # The workers rebuild the vocabulary from a plain dict, which also covers mappings
+        # that carry a non-picklable default factory
+        with multiprocessing.Pool(n_jobs, initializer=_init_encoder_worker, initargs=(dict(word2idx),)) as pool:
+            encoded_chunks = pool.map(_encode_chunk, [(chunk, model_type) for chunk in chunks])
+        return tuple(_concatenate_padded(arrays) for arrays in zip(*encoded_chunks))
     samples = {
         "OneEdgeModel": lambda: (encode_batch_questions(selected_questions, word2idx)[..., 0, :],
                                  encode_batch_graphs(selected_questions, word2idx)[..., 0, 0, :]),
@@ -44,6 +55,37 @@ def encode_for_model(selected_questions, model_type, word2idx=None):
     return samples
 
 
+_WORKER_VOCAB = None
+
+
+def _init_encoder_worker(word2idx):
+    global _WORKER_VOCAB
+    _WORKER_VOCAB = _utils.Vocabulary(word2idx)
+
+
+def _encode_chunk(args):
+    chunk, model_type = args
+    return encode_for_model(chunk, model_type, _WORKER_VOCAB)
+
+
+def _concatenate_padded(arrays):
+    """
+    Concatenate encoded chunks along the sample axis. The number of graph candidates can differ
+    between chunks, so the smaller arrays are zero-padded to the largest chunk shape, matching
+    the padding the encoders produce themselves.
+
+    :param arrays: a list of arrays that only differ in sample and graph dimensions
+    :return: a single array with all samples
+    """
+    target_shape = [max(a.shape[d] for a in arrays) for d in range(1, arrays[0].ndim)]
+    out = np.zeros((sum(a.shape[0] for a in arrays), *target_shape), dtype=arrays[0].dtype)
+    offset = 0
+    for a in arrays:
+        out[(slice(offset, offset + a.shape[0]),) + tuple(slice(0, d) for d in a.shape[1:])] = a
+        offset += a.shape[0]
+    return out
+
+
 def extend_embeddings_with_special_tokens(embeddings, word2idx):
     for el in SPECIAL_TOKENS.values():
         word2idx[el] = len(word2idx)
@@ -53,14 +95,36 @@ def extend_embeddings_with_special_tokens(embeddings, word2idx):
     std = np.std(embeddings)
     mean = np.mean(embeddings)
     embeddings = np.concatenate((embeddings,
-                                 std*np.random.randn(len(word2idx) - embeddings.shape[0], embeddings.shape[1]))+mean,
+                                 std*_utils.rng.randn(len(word2idx) - embeddings.shape[0], embeddings.shape[1]))+mean,
                                 axis=0)
     return embeddings, word2idx
 
 
+def _lookup_word_ids(tokens, vocab, memo):
+    """
+    Map tokens to vocabulary indices, memoizing the lowercasing and the dictionary lookup
+    per distinct token. Tokens repeat heavily across graphs and questions in a batch, so the
+    memo turns most lookups into a single dict probe on the original token.
+
+    :param tokens: a list of tokens
+    :param vocab: mapping from lowercased words to indices
+    :param memo: a dictionary shared across one batch encoding
+    :return: a list of integer word indices
+    """
+    word_ids = []
+    for w in tokens:
+        idx = memo.get(w)
+        if idx is None:
+            idx = vocab[w.lower()]
+            memo[w] = idx
+        word_ids.append(idx)
+    return word_ids
+
+
 def encode_batch_graphs(questions: List[Sentence], vocab):
     max_negative_graphs = min(max(len(s.graphs) for s in questions), MAX_NEGATIVE_GRAPHS)
     out = np.zeros((len(questions), max_negative_graphs, MAX_EDGES, 2, MAX_LABEL_TOKEN_LEN), dtype=np.int32)
+    word_idx_memo = {}
     for i, s in enumerate(questions):  # Iterate over lists of graphs for questions
         entity2label = {k: l for e in s.entities for k, l in e['linkings']}
         entity2type = {k: e['type'] for e in s.entities for k, l in e['linkings']}
@@ -70,32 +134,30 @@ def encode_batch_graphs(questions: List[Sentence], vocab):
                               and e.relationid not in graph_queries.sparql_class_relation] \
                              + [e for e in g.graph.edges if e.relationid in graph_queries.sparql_class_relation]
                 for ei, e in enumerate(main_edges[:MAX_EDGES]):
-                    word_ids = [vocab[w.lower()]
-                                for w in _get_edge_str_representation(e, entity2label, entity2type,
-                                                                      replace_entities=True,
-                                                                      mark_boundaries=True)][:MAX_LABEL_TOKEN_LEN]
+                    tokens_replaced, tokens_verbatim = _get_edge_token_variants(e, entity2label, entity2type)
+                    word_ids = _lookup_word_ids(tokens_replaced[:MAX_LABEL_TOKEN_LEN], vocab, word_idx_memo)
                     out[i, gi, ei, 0, :len(word_ids)] = word_ids
-                    word_ids = [vocab[w.lower()]
-                                for w in _get_edge_str_representation(e, entity2label, entity2type,
-                                                                      replace_entities=False,
-                                                                      mark_boundaries=True)][:MAX_LABEL_TOKEN_LEN]
+                    word_ids = _lookup_word_ids(tokens_verbatim[:MAX_LABEL_TOKEN_LEN], vocab, word_idx_memo)
                     out[i, gi, ei, 1, :len(word_ids)] = word_ids
     return out
 
 
 def encode_batch_questions(questions: List[Sentence], vocab):
     out = np.zeros((len(questions), 2,  MAX_LABEL_TOKEN_LEN), dtype=np.int32)
+    word_idx_memo = {}
     for i, s in enumerate(questions):  # Iterate over lists of graphs for questions
-        word_ids = [vocab[w.lower()] for w in _get_sentence_tokens(s, replace_entities=True, mark_boundaries=True)][:MAX_LABEL_TOKEN_LEN]
+        sentence_tokens = _get_sentence_tokens(s, replace_entities=True, mark_boundaries=True)[:MAX_LABEL_TOKEN_LEN]
+        word_ids = _lookup_word_ids(sentence_tokens, vocab, word_idx_memo)
         out[i, 0, :len(word_ids)] = word_ids
-        word_ids = [vocab[w.lower()] for w in _get_sentence_tokens(s, replace_entities=False, mark_boundaries=True)][:MAX_LABEL_TOKEN_LEN]
+        sentence_tokens = _get_sentence_tokens(s, replace_entities=False, mark_boundaries=True)[:MAX_LABEL_TOKEN_LEN]
+        word_ids = _lookup_word_ids(sentence_tokens, vocab, word_idx_memo)
         out[i, 1, :len(word_ids)] = word_ids
     return out
 
 
 def encode_structural_features(questions: List[Sentence]):
     max_negative_graphs = min(max(len(s.graphs) for s in questions), MAX_NEGATIVE_GRAPHS)
-    out = np.zeros((len(questions), max_negative_graphs, 7), dtype=np.int32)
+    out = np.zeros((len(questions), max_negative_graphs, 7), dtype=np.int16)
     for i, s in enumerate(questions):  # Iterate over lists of graphs for questions
         tokens = {t.lower() for t in s.tokens}
         for j, g in enumerate(s.graphs[:max_negative_graphs]):  # Iterate over graph alternatives for a question
@@ -159,12 +221,12 @@ def _get_edge_str_representation(edge: Edge, entity2label, entity2type,
     ['<s>', 'capital', 'point', 'in', 'time', '<f>']
     """
     property_label = [""]
-    p_meta = scheme.property2label.get(edge.relationid)
-    if p_meta:
-        property_label = _utils.split_pattern.split(p_meta['label'])
-    p_meta = scheme.property2label.get(edge.qualifierrelationid)
-    if p_meta:
-        property_label += _utils.split_pattern.split(p_meta['label'])
+    label_tokens = _property_label_tokens(edge.relationid)
+    if label_tokens is not None:
+        property_label = list(label_tokens)
+    label_tokens = _property_label_tokens(edge.qualifierrelationid)
+    if label_tokens is not None:
+        property_label += label_tokens
     entity_kbids = [n for n in edge.nodes() if n and n != graph_queries.QUESTION_VAR]
     if any(entity_kbids) and not no_entity:
         entity_kbid = entity_kbids[0]
@@ -174,6 +236,53 @@ def _get_edge_str_representation(edge: Edge, entity2label, entity2type,
     return property_label
 
 
+def _get_edge_token_variants(edge: Edge, entity2label, entity2type):
+    """
+    Build both string representations of an edge (entities replaced and verbatim) in one pass.
+    The property label prefix is identical between the two variants, so this computes it once
+    per edge instead of once per variant as two _get_edge_str_representation calls would.
+
+    :param edge: the edge to represent
+    :param entity2label: mapping from entity kb ids to labels
+    :param entity2type: mapping from entity kb ids to entity types
+    :return: a tuple of two token lists, both with boundary markers
+    """
+    property_label = [""]
+    label_tokens = _property_label_tokens(edge.relationid)
+    if label_tokens is not None:
+        property_label = list(label_tokens)
+    label_tokens = _property_label_tokens(edge.qualifierrelationid)
+    if label_tokens is not None:
+        property_label += label_tokens
+    tokens_replaced = tokens_verbatim = property_label
+    entity_kbids = [n for n in edge.nodes() if n and n != graph_queries.QUESTION_VAR]
+    if any(entity_kbids):
+        entity_kbid = entity_kbids[0]
+        tokens_replaced = property_label + _entity_kbid2token(entity_kbid, entity2label, entity2type,
+                                                              replace_entities=True, mark_boundaries=False)
+        tokens_verbatim = property_label + _entity_kbid2token(entity_kbid, entity2label, entity2type,
+                                                              replace_entities=False, mark_boundaries=False)
+    tokens_replaced = SENT_TOKENS[0:1] + tokens_replaced + SENT_TOKENS[1:2]
+    tokens_verbatim = SENT_TOKENS[0:1] + tokens_verbatim + SENT_TOKENS[1:2]
+    return tokens_replaced, tokens_verbatim
+
+
+@lru_cache(maxsize=None)
+def _property_label_tokens(property_id):
+    """
+    Tokenize the label of a knowledge base property. The property inventory is small and fixed,
+    while edges repeat the same property ids across all graph candidates, so the split is cached
+    per property id.
+
+    :param property_id: a property id, e.g. "P175", or None
+    :return: a tuple of label tokens or None if the property is unknown
+    """
+    p_meta = scheme.property2label.get(property_id)
+    if not p_meta:
+        return None
+    return tuple(_utils.split_pattern.split(p_meta['label']))
+
+
 def _entity_kbid2token(entity_kbid, entity2label, entity2type, replace_entities, mark_boundaries=False, resolve_m=True):
     if entity_kbid in {"MIN", "MAX"}:
         tokens = [SPECIAL_TOKENS[entity_kbid]]
@@ -203,6 +312,7 @@ def encode_batch_graph_structure(questions: List[Sentence], vocab):
     out_A_nodes = np.zeros((len(questions), max_negative_graphs, MAX_EDGES, MAX_EDGES_PER_ENTITY), dtype=np.uint8)
     out_A_edges = np.zeros((len(questions), max_negative_graphs, MAX_EDGES, MAX_EDGES_PER_ENTITY), dtype=np.uint8)
 
+    word_idx_memo = {}
     for i, s in enumerate(questions):  # Iterate over lists of graphs for questions
         entity2label = {k: l for e in s.entities for k, l in e['linkings']}
         entity2type = {k: e['type'] for e in s.entities for k, l in e['linkings']}
@@ -222,7 +332,7 @@ def encode_batch_graph_structure(questions: List[Sentence], vocab):
                                                    replace_entities=False,
                                                    mark_boundaries=False, resolve_m=False)
                 if entity_tokens:
-                    word_ids = [vocab[w.lower()] for w in entity_tokens][:MAX_LABEL_TOKEN_LEN//2]
+                    word_ids = _lookup_word_ids(entity_tokens[:MAX_LABEL_TOKEN_LEN//2], vocab, word_idx_memo)
                     out_nodes[i, gi, ni, :len(word_ids)] = word_ids
                 else:
                     out_nodes[i, gi, ni, 0] = vocab[ENTITY_TOKEN.lower()]
@@ -236,7 +346,7 @@ def encode_batch_graph_structure(questions: List[Sentence], vocab):
                                                                mark_boundaries=False,
                                                                no_entity=True)
                 if property_tokens:
-                    word_ids = [vocab[w.lower()] for w in property_tokens][:MAX_LABEL_TOKEN_LEN//2]
+                    word_ids = _lookup_word_ids(property_tokens[:MAX_LABEL_TOKEN_LEN//2], vocab, word_idx_memo)
                     out_edges[i, gi, ei, :len(word_ids)] = word_ids
 
                 if e.leftentityid in node2id:
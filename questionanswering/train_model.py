@@ -69,15 +69,17 @@ def train(config_file_path, seed, gpuid, model_description, experiment_tag):
     model_type = config['training']["model_type"]
     logger.info(f"Model type: {model_type}")
 
+    encoding_jobs = config['training'].get("encoding.jobs", 1)
+
     V.MAX_NEGATIVE_GRAPHS = 50
     training_dataset = [s for s in training_dataset if any(scores[2] > losses.MIN_TARGET_VALUE for g, scores in s.graphs)]
-    training_samples, training_targets = pack_data(training_dataset, word2idx, model_type)
+    training_samples, training_targets = pack_data(training_dataset, word2idx, model_type, n_jobs=encoding_jobs)
     logger.info(f"Data encoded: {[m.shape for m in training_samples]}")
 
     V.MAX_NEGATIVE_GRAPHS = 100
     val_dataset = [s for s in val_dataset if any(scores[2] > losses.MIN_TARGET_VALUE for g, scores in s.graphs)]
     print(f"Val F1 upper bound: {np.average([q.graphs[0].scores[2] for q in val_dataset])}")
-    val_samples, val_targets = pack_data(val_dataset, word2idx, model_type)
+    val_samples, val_targets = pack_data(val_dataset, word2idx, model_type, n_jobs=encoding_jobs)
     logger.info(f"Val data encoded: {[m.shape for m in val_samples]}")
 
     encoder = models.ConvWordsEncoder(
@@ -89,10 +91,11 @@ def train(config_file_path, seed, gpuid, model_description, experiment_tag):
     net = getattr(models, model_type)(encoder, **config['model'])
 
     def metrics(targets, predictions, validation=False):
-        _, predicted_targets = torch.topk(predictions, 1, dim=-1)
-        _, targets = torch.topk(targets, 1, dim=-1)
-        predicted_targets = predicted_targets.squeeze(1)
-        targets = targets.squeeze(1)
+        # A plain argmax is enough here, no need for the top-k machinery
+        _, predicted_targets = torch.max(predictions, dim=-1)
+        _, targets = torch.max(targets, dim=-1)
+        predicted_targets = predicted_targets.view(-1)
+        targets = targets.view(-1)
         cur_acc = torch.sum(predicted_targets == targets).float()
         cur_acc /= predicted_targets.size(0)
         cur_f1 = 0.0
@@ -176,16 +179,17 @@ def train(config_file_path, seed, gpuid, model_description, experiment_tag):
 
 def pack_data(selected_questions: List[Sentence],
               word2idx,
-              model_type):
+              model_type,
+              n_jobs=1):
     max_negative_graphs = min(max(len(s.graphs) for s in selected_questions), V.MAX_NEGATIVE_GRAPHS)
-    targets = np.zeros((len(selected_questions), max_negative_graphs))
+    targets = np.zeros((len(selected_questions), max_negative_graphs), dtype=np.float32)
     for qi, q in enumerate(selected_questions):
         q.graphs = q.graphs[:max_negative_graphs]
         random.shuffle(q.graphs)
         for gi, g in enumerate(q.graphs):
             targets[qi, gi] = g.scores[2]
 
-    samples = V.encode_for_model(selected_questions, model_type, word2idx)
+    samples = V.encode_for_model(selected_questions, model_type, word2idx, n_jobs=n_jobs)
     return samples, targets
 
 